@@ -0,0 +1,94 @@
+import atexit
+import multiprocessing
+import sys
+
+from maya import cmds
+
+from rig_helpers.attributes.lib import AttributeHelper
+
+
+def _initialize_worker(scene_path):
+    """
+    Initialize Maya in a worker process and open the scene
+
+    Notes:
+        Maya is uninitialized when the worker process exits
+
+    Args:
+        scene_path (str): Path of the scene to open
+    """
+
+    from maya import standalone
+
+    standalone.initialize()
+    atexit.register(standalone.uninitialize)
+    cmds.file(scene_path, open=True, force=True)
+
+
+def _get_nodes_attributes_values(nodes, attributes_list):
+    """
+    Get attribute values from a list of nodes
+
+    Args:
+        nodes (list): Node names
+        attributes_list (list): Attributes names
+
+    Returns:
+        dict. {'node1': {'attr1': value, 'attr2':value, ...}, ...}
+    """
+
+    return dict((node, AttributeHelper(node).get_attributes_values(attributes_list)) for node in nodes)
+
+
+def get_many_attribute_values(nodes, attributes_list, workers=None):
+    """
+    Get attribute values from many nodes
+
+    Notes:
+        In mayapy batch mode under Python 3.7 or newer, with a saved scene without modifications, the nodes are
+        split between worker processes that open the same scene. Otherwise, the nodes are queried sequentially.
+        Spawned workers import the main module of the calling script again, the script must run its code
+        under an if __name__ == '__main__': guard or every worker runs it too
+
+    Args:
+        nodes (list): Node names
+        attributes_list (list): Attributes names
+        workers (int): Optional. Number of worker processes. Defaults to the number of CPUs
+
+    Returns:
+        dict. {'node1': {'attr1': value, 'attr2':value, ...}, ...}
+    """
+
+    nodes = list(nodes)
+
+    # ProcessPoolExecutor with a spawn context and an initializer needs Python 3.7, Maya 2020 runs Python 2.7
+    if sys.version_info < (3, 7):
+        return _get_nodes_attributes_values(nodes, attributes_list)
+
+    scene_path = cmds.file(query=True, sceneName=True)
+
+    # Workers read the scene from disk, unsaved changes would not be seen by them
+    if not cmds.about(batch=True) or not scene_path or cmds.file(query=True, modified=True):
+        return _get_nodes_attributes_values(nodes, attributes_list)
+
+    workers = min(workers or multiprocessing.cpu_count(), len(nodes))
+    if workers < 2:
+        return _get_nodes_attributes_values(nodes, attributes_list)
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Split the nodes in one contiguous chunk per worker
+    chunk_size = -(-len(nodes) // workers)
+    chunks = [nodes[i:i + chunk_size] for i in range(0, len(nodes), chunk_size)]
+
+    attributes_values = {}
+
+    # Spawned workers start a clean mayapy instead of forking the initialized Maya session
+    with ProcessPoolExecutor(max_workers=len(chunks),
+                             mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_initialize_worker,
+                             initargs=(scene_path,)) as executor:
+        for chunk_values in executor.map(_get_nodes_attributes_values, chunks, [attributes_list] * len(chunks)):
+            attributes_values.update(chunk_values)
+
+    return attributes_values
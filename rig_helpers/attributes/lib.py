@@ -1,53 +1,551 @@
+from contextlib import contextmanager
+
 from maya import cmds
+from maya.api import OpenMaya
+
+from rig_helpers.utils.lib import bulk_edit, clear_node_cache, get_node_object, undo_chunk
+
+
+_TRANSLATE_ATTRS = ('translateX', 'translateY', 'translateZ')
+_ROTATE_ATTRS = ('rotateX', 'rotateY', 'rotateZ')
+_SCALE_ATTRS = ('scaleX', 'scaleY', 'scaleZ')
+_TRS_ATTRS = ('translate', 'rotate', 'scale')
+
+# Children of the transform compound attributes
+_COMPOUND_CHILDREN = {'translate': _TRANSLATE_ATTRS,
+                      'rotate': _ROTATE_ATTRS,
+                      'scale': _SCALE_ATTRS}
+
+# Plug name suffixes of the transform compound children, '.translateX', '.translateY', ...
+_COMPOUND_PLUG_SUFFIXES = dict((attr, tuple('.' + child for child in children))
+                               for attr, children in _COMPOUND_CHILDREN.items())
+
+
+# Minimum number of writes to suspend the evaluation manager while editing
+_BULK_EDIT_MIN_WRITES = 10
+
+
+def clear_attribute_exists_cache():
+    """
+    Clear the cached nodes used by the attribute existence checks
+
+    Notes:
+        Cached nodes are validated when they are used, this only releases them
+    """
+
+    clear_node_cache()
+
+
+def _attribute_exists(node, attribute_name):
+    """
+    Check if an attribute exists in a node
+
+    Notes:
+        The node is cached while it is alive and keeps its name, the attribute is checked on its function set
+
+    Args:
+        node (str): Node name
+        attribute_name (str): Attribute name
+
+    Returns:
+        bool
+    """
+
+    node_object = get_node_object(node)
+    if node_object is None:
+        return False
+
+    if OpenMaya.MFnDependencyNode(node_object).hasAttribute(attribute_name):
+        return True
+
+    # Aliases, indexed and child plugs are resolved by the plug name
+    selection = OpenMaya.MSelectionList()
+    try:
+        selection.add('{}.{}'.format(node, attribute_name))
+    except RuntimeError:
+        return False
+
+    return True
+
+
+def _edit_context(writes_count):
+    """
+    Get the context that groups a number of writes in a single undo chunk
+
+    Notes:
+        bulk_edit is only used for many writes, switching the evaluation mode rebuilds the evaluation graph
+        and costs more than it saves for a few writes
+
+    Args:
+        writes_count (int): Number of writes done inside the context
+
+    Returns:
+        context manager
+    """
+
+    if writes_count >= _BULK_EDIT_MIN_WRITES:
+        return bulk_edit()
+
+    return undo_chunk()
+
+
+def _values_match(value, target, tolerance=1e-6):
+    """
+    Check if an attribute value already matches a target value
+
+    Args:
+        value: Current value
+        target: Target value
+        tolerance (float): Maximum difference for numeric values. Defaults to 1e-6
+
+    Returns:
+        bool
+    """
+
+    try:
+        return abs(value - target) <= tolerance
+    except TypeError:
+        return value == target
+
+
+def _get_api_default_value(attribute_object):
+    """
+    Get the default value of a numeric or enum attribute with openMaya
+
+    Args:
+        attribute_object (OpenMaya.MObject): Attribute to query
+
+    Returns:
+        value or None if the attribute type is not supported
+    """
+
+    if attribute_object.hasFn(OpenMaya.MFn.kEnumAttribute):
+        return OpenMaya.MFnEnumAttribute(attribute_object).default
+
+    if attribute_object.hasFn(OpenMaya.MFn.kNumericAttribute):
+        default_value = OpenMaya.MFnNumericAttribute(attribute_object).default
+        # Compound numeric attributes are reset through their children
+        if not isinstance(default_value, tuple):
+            return default_value
+
+    return None
+
+
+def _get_distance_value(plug):
+    """
+    Get the value of a linear plug in UI units
+
+    Args:
+        plug (OpenMaya.MPlug): Plug to read
+
+    Returns:
+        float
+    """
+
+    return plug.asMDistance().asUnits(OpenMaya.MDistance.uiUnit())
+
+
+def _get_angle_value(plug):
+    """
+    Get the value of an angular plug in UI units
+
+    Args:
+        plug (OpenMaya.MPlug): Plug to read
+
+    Returns:
+        float
+    """
+
+    return plug.asMAngle().asUnits(OpenMaya.MAngle.uiUnit())
+
+
+def _get_time_value(plug):
+    """
+    Get the value of a time plug in UI units
+
+    Args:
+        plug (OpenMaya.MPlug): Plug to read
+
+    Returns:
+        float
+    """
+
+    return plug.asMTime().asUnits(OpenMaya.MTime.uiUnit())
+
+
+# getAttr type names and plug getters of the attribute types readable with openMaya
+_NUMERIC_ATTRIBUTE_TYPES = {OpenMaya.MFnNumericData.kBoolean: ('bool', OpenMaya.MPlug.asBool),
+                            OpenMaya.MFnNumericData.kByte: ('byte', OpenMaya.MPlug.asInt),
+                            OpenMaya.MFnNumericData.kChar: ('char', OpenMaya.MPlug.asInt),
+                            OpenMaya.MFnNumericData.kShort: ('short', OpenMaya.MPlug.asInt),
+                            OpenMaya.MFnNumericData.kInt: ('long', OpenMaya.MPlug.asInt),
+                            OpenMaya.MFnNumericData.kFloat: ('float', OpenMaya.MPlug.asDouble),
+                            OpenMaya.MFnNumericData.kDouble: ('double', OpenMaya.MPlug.asDouble)}
+_ATTRIBUTE_TYPES = {OpenMaya.MFn.kEnumAttribute: ('enum', OpenMaya.MPlug.asInt),
+                    OpenMaya.MFn.kDoubleLinearAttribute: ('doubleLinear', _get_distance_value),
+                    OpenMaya.MFn.kFloatLinearAttribute: ('floatLinear', _get_distance_value),
+                    OpenMaya.MFn.kDoubleAngleAttribute: ('doubleAngle', _get_angle_value),
+                    OpenMaya.MFn.kFloatAngleAttribute: ('floatAngle', _get_angle_value),
+                    OpenMaya.MFn.kTimeAttribute: ('time', _get_time_value)}
+_STRING_ATTRIBUTE_TYPE = ('string', OpenMaya.MPlug.asString)
+
+
+def _get_plug_attribute_type(plug):
+    """
+    Get the getAttr type name and the openMaya getter of a plug
+
+    Args:
+        plug (OpenMaya.MPlug): Plug to check
+
+    Returns:
+        (str, function) type name and getter or None if the plug can not be read with openMaya
+    """
+
+    if plug.isArray or plug.isCompound:
+        return None
+
+    attribute_object = plug.attribute()
+    api_type = attribute_object.apiType()
+
+    if api_type == OpenMaya.MFn.kNumericAttribute:
+        return _NUMERIC_ATTRIBUTE_TYPES.get(OpenMaya.MFnNumericAttribute(attribute_object).numericType())
+
+    if api_type == OpenMaya.MFn.kTypedAttribute:
+        if OpenMaya.MFnTypedAttribute(attribute_object).attrType() == OpenMaya.MFnData.kString:
+            return _STRING_ATTRIBUTE_TYPE
+        return None
+
+    return _ATTRIBUTE_TYPES.get(api_type)
+
+
+def _get_plug_value(plug, plug_name):
+    """
+    Get the value of a plug with openMaya
+
+    Notes:
+        Linear, angular and time values are returned in UI units, same as cmds.getAttr.
+        Attribute types without a direct plug getter are queried with cmds.getAttr.
+        Empty strings are also queried with cmds.getAttr, it returns None for strings that were never set
+
+    Args:
+        plug (OpenMaya.MPlug): Plug to read
+        plug_name (str): Name of the plug, used for the cmds.getAttr fallback
+
+    Returns:
+        value
+    """
+
+    attribute_type = _get_plug_attribute_type(plug)
+    if attribute_type is None:
+        return cmds.getAttr(plug_name)
+
+    value = attribute_type[1](plug)
+
+    # MPlug.asString returns '' for empty and never set strings alike
+    if attribute_type is _STRING_ATTRIBUTE_TYPE and not value:
+        return cmds.getAttr(plug_name)
+
+    return value
+
+
+def _get_plug_type(plug, plug_name):
+    """
+    Get the data type of a plug with openMaya
+
+    Notes:
+        Attribute types without a known type name are queried with cmds.getAttr
+
+    Args:
+        plug (OpenMaya.MPlug): Plug to check
+        plug_name (str): Name of the plug, used for the cmds.getAttr fallback
+
+    Returns:
+        str. Type name as returned by cmds.getAttr
+    """
+
+    attribute_type = _get_plug_attribute_type(plug)
+    if attribute_type is None:
+        return cmds.getAttr(plug_name, type=True)
+
+    return attribute_type[0]
 
 
 class AttributeHelper(object):
     def __init__(self, obj):
         """
+        Notes:
+            The object existence is checked once here, create the helper after the object
+
         Args:
             obj: (str): Maya object name
         """
 
         self.obj = obj
+        self._exists = cmds.objExists(obj)
+        self._prefix = '{}.'.format(obj)
+        self._attr_cache = None
+        self._dependency_node = None
+        self._plug_cache = {}
+        self._batch_writes = None
+        self._batch_plugs = None
+
+    def _plug(self, attribute_name):
+        """
+        Build the plug name of an attribute in the object
+
+        Args:
+            attribute_name (str): Attribute name
+
+        Returns:
+            str. 'obj.attribute_name'
+        """
+
+        # The object prefix is built once, plug names only need a concatenation
+        return self._prefix + attribute_name
+
+    def _check_exists(self):
+        """
+        Check that the object existed when the helper was created
+
+        Raises:
+            RuntimeError: when the object does not exist
+        """
+
+        if not self._exists:
+            raise RuntimeError('Object: "{}" no exists in the scene'.format(self.obj))
+
+    def _get_dependency_node(self):
+        """
+        Get the OpenMaya function set of the object
+
+        Returns:
+            OpenMaya.MFnDependencyNode
+        """
+
+        if self._dependency_node is None:
+            selection = OpenMaya.MSelectionList()
+            selection.add(self.obj)
+            self._dependency_node = OpenMaya.MFnDependencyNode(selection.getDependNode(0))
+
+        return self._dependency_node
+
+    def _get_api_plug(self, attribute_name):
+        """
+        Get the openMaya plug of an attribute in the object
+
+        Notes:
+            Plugs are cached per attribute name until invalidate_cache is called
+
+        Args:
+            attribute_name (str): Attribute name
+
+        Raises:
+            RuntimeError: when the attribute does not exist
+
+        Returns:
+            OpenMaya.MPlug
+        """
+
+        if attribute_name in self._plug_cache:
+            return self._plug_cache[attribute_name]
+
+        try:
+            plug = self._get_dependency_node().findPlug(attribute_name, False)
+        except RuntimeError:
+            # findPlug does not resolve indexed plugs, the selection list does
+            selection = OpenMaya.MSelectionList()
+            try:
+                selection.add(self._plug(attribute_name))
+            except RuntimeError:
+                raise RuntimeError('Attribute: "{}" no exists in object: "{}"'.format(attribute_name, self.obj))
+            plug = selection.getPlug(0)
+
+        self._plug_cache[attribute_name] = plug
+
+        return plug
+
+    def _get_attributes_cache(self):
+        """
+        Get the attribute names of the object grouped by state
+
+        Notes:
+            Queried with one listAttr per state the first time it is needed,
+            the methods editing attributes call invalidate_cache
+
+        Returns:
+            dict. {'long_names': {name: long_name}, 'locked': frozenset, 'keyable': frozenset,
+                   'channel_box': frozenset}
+        """
+
+        if self._attr_cache is not None:
+            return self._attr_cache
+
+        try:
+            long_names = cmds.listAttr(self.obj) or []
+            short_names = cmds.listAttr(self.obj, shortNames=True) or []
+        except ValueError:
+            # The object does not exist, every check falls back to Maya commands
+            long_names = short_names = []
+
+        # Both queries list the attributes in the same order
+        names = dict(zip(long_names, long_names))
+        if len(short_names) == len(long_names):
+            names.update(zip(short_names, long_names))
+
+        locked = keyable = channel_box = []
+        if names:
+            locked = cmds.listAttr(self.obj, locked=True) or []
+            keyable = cmds.listAttr(self.obj, keyable=True) or []
+            channel_box = cmds.listAttr(self.obj, channelBox=True) or []
+
+        self._attr_cache = {'long_names': names,
+                            'locked': frozenset(locked),
+                            'keyable': frozenset(keyable),
+                            'channel_box': frozenset(channel_box)}
+
+        return self._attr_cache
+
+    def invalidate_cache(self):
+        """
+        Clear the cached attribute names, states and plugs, they are queried again when needed
+        """
+
+        self._attr_cache = None
+        self._plug_cache = {}
+
+    def _set_attr(self, plug, *args, **kwargs):
+        """
+        Run cmds.setAttr or queue it when a batch is open
+
+        Args:
+            plug (str): Plug name
+            *args: cmds.setAttr values
+            **kwargs: cmds.setAttr flags
+        """
+
+        if self._batch_writes is not None:
+            self._batch_writes.append((plug, args, kwargs))
+            self._batch_plugs.add(plug)
+            return
+
+        cmds.setAttr(plug, *args, **kwargs)
+
+    def _is_queued(self, plug):
+        """
+        Check if a plug has writes queued in the open batch
+
+        Args:
+            plug (str): Plug name
+
+        Returns:
+            bool
+        """
+
+        return self._batch_plugs is not None and plug in self._batch_plugs
+
+    @contextmanager
+    def batch(self):
+        """
+        Queue the values and flags set inside the context and write them on exit
+
+        Notes:
+            The queued writes run in a single undo chunk, many writes also suspend the viewport refresh
+            and the evaluation manager. Nothing is written when the context raises. Values read inside
+            the context are the values before the batch.
+            Every setAttr of the helper is queued, attributes are still added and edited with addAttr
+            immediately. Attributes with queued writes can not be deleted inside the batch
+        """
+
+        # Nested batches are written by the outer one
+        if self._batch_writes is not None:
+            yield self
+            return
+
+        writes = self._batch_writes = []
+        self._batch_plugs = set()
+        try:
+            yield self
+        finally:
+            self._batch_writes = None
+            self._batch_plugs = None
+
+        if not writes:
+            return
+
+        set_attr = cmds.setAttr
+        with _edit_context(len(writes)):
+            for plug, args, kwargs in writes:
+                set_attr(plug, *args, **kwargs)
+
+        self.invalidate_cache()
 
     # ---------- Checks Methods ----------
-    def attribute_exists(self, attribute_name):
+    def attribute_exists(self, attribute_name, exact=False):
         """
         Check if attributes exists in the object
 
+        Notes:
+            By default the plug is resolved as cmds.objExists does, so indexed and child plugs exist too.
+            exact only accepts attributes of the node, as cmds.attributeQuery does
+
         Args:
             attribute_name (str): Attribute name
+            exact (bool): Optional. Check the attribute with cmds.attributeQuery. Defaults to False
 
         Returns:
             bool
         """
 
-        # Check if attributes exists
-        if cmds.attributeQuery(attribute_name, node=self.obj, exists=True):
+        # Missing objects have no attributes, skips the Maya queries
+        if not self._exists:
+            return False
+
+        if exact:
+            return cmds.attributeQuery(attribute_name, node=self.obj, exists=True)
+
+        # The attributes cache is only used when it is already built, listAttr is slower than a plug probe
+        if self._attr_cache is not None and attribute_name in self._attr_cache['long_names']:
             return True
 
-        return False
+        return _attribute_exists(self.obj, attribute_name)
 
-    def is_attribute_locked(self, attribute_name):
+    def is_attribute_locked(self, attribute_name, bulk=False):
         """
         Returns True if the attributes us locked.
 
+        Notes:
+            Single checks read the lock state from the plug. When checking many attributes of the object,
+            bulk reads it from the cached listAttr queries instead, call invalidate_cache after editing the object
+
         Args:
             attribute_name (str): Attribute name
+            bulk (bool): Optional. Use the cached attribute states. Defaults to False
 
         Returns:
             bool
         """
 
+        if bulk:
+            attributes_cache = self._get_attributes_cache()
+            long_name = attributes_cache['long_names'].get(attribute_name)
+            if long_name is not None:
+                return long_name in attributes_cache['locked']
+
         if not self.attribute_exists(attribute_name=attribute_name):
             return False
 
-        return bool(cmds.getAttr('{}.{}'.format(self.obj, attribute_name), lock=True))
+        try:
+            return self._get_api_plug(attribute_name).isLocked
+        except RuntimeError:
+            return False
 
     def is_attribute_connected(self, attribute_name):
         """
         Returns True if the attributes has an incoming connection
 
+        Notes:
+            Compound and array attributes are connected when any child or element has an incoming connection
+
         Args:
             attribute_name (str): Attribute name
 
@@ -61,7 +559,9 @@ class AttributeHelper(object):
         if self.is_attribute_locked(attribute_name=attribute_name):
             return False
 
-        return bool(cmds.listConnections('{}.{}'.format(self.obj, attribute_name), destination=False))
+        # listConnections also reports the connections of children and array elements,
+        # connectionInfo(isDestination) only checks the plug and its parents
+        return bool(cmds.listConnections(self._plug(attribute_name), destination=False))
 
     def is_attribute_animated(self, attribute_name):
         """
@@ -74,15 +574,13 @@ class AttributeHelper(object):
             bool
         """
 
-        if not self.is_attribute_connected(attribute_name=attribute_name):
+        if not self.attribute_exists(attribute_name=attribute_name):
             return False
 
-        connected_node = cmds.listConnections('{}.{}'.format(self.obj, attribute_name), destination=False)[0]
-
-        if not cmds.nodeType(connected_node).startswith('animCurve'):
+        if self.is_attribute_locked(attribute_name=attribute_name):
             return False
 
-        return True
+        return bool(cmds.listConnections(self._plug(attribute_name), destination=False, type='animCurve'))
 
     def is_attribute_settable(self, attribute_name):
         """
@@ -98,21 +596,38 @@ class AttributeHelper(object):
         if not self.attribute_exists(attribute_name=attribute_name):
             return False
 
-        return cmds.getAttr('{}.{}'.format(self.obj, attribute_name), settable=True)
+        return cmds.getAttr(self._plug(attribute_name), settable=True)
 
-    def is_attribute_in_channel_box(self, attribute_name):
+    def is_attribute_in_channel_box(self, attribute_name, bulk=False):
         """
         Returns True if the attributes is visible in the channel box
 
+        Notes:
+            Single checks query the plug flags directly. When checking many attributes of the object,
+            bulk reads the keyable and channel box states from the cached listAttr queries instead
+
         Args:
             attribute_name (str): Attribute name
+            bulk (bool): Optional. Use the cached attribute states. Defaults to False
 
         Returns:
             True if the attributes is visible in the channel box
         """
 
-        if not self.attribute_exists(attribute_name=attribute_name):
-            return False
+        if bulk:
+            attributes_cache = self._get_attributes_cache()
+            long_name = attributes_cache['long_names'].get(attribute_name)
+            if long_name not in attributes_cache['keyable'] and long_name not in attributes_cache['channel_box']:
+                return False
+
+        else:
+            # Skips the listAttr queries of the attributes cache
+            if not _attribute_exists(self.obj, attribute_name):
+                return False
+
+            plug = self._plug(attribute_name)
+            if not cmds.getAttr(plug, keyable=True) and not cmds.getAttr(plug, channelBox=True):
+                return False
 
         if cmds.attributeQuery(attribute_name, node=self.obj, hidden=True):
             return False
@@ -120,10 +635,6 @@ class AttributeHelper(object):
         if cmds.attributeQuery(attribute_name, node=self.obj, attributeType=True) == 'typed':
             return False
 
-        l = set(cmds.listAttr(self.obj, channelBox=False)).intersection(cmds.listAttr(self.obj, keyable=True))
-        if attribute_name not in l:
-            return False
-
         return True
 
     # ---------- Set Methods ----------
@@ -137,10 +648,12 @@ class AttributeHelper(object):
             **kwargs:
         """
 
+        self._check_exists()
+
         if not self.attribute_exists(attribute_name=attribute_name):
             return False
 
-        cmds.setAttr('{}.{}'.format(self.obj, attribute_name), value, **kwargs)
+        self._set_attr(self._plug(attribute_name), value, **kwargs)
 
     def set_attribute_default_value(self, attribute_name, default_value):
         """
@@ -151,11 +664,14 @@ class AttributeHelper(object):
             default_value: Value to set
         """
 
+        self._check_exists()
+
         if not self.is_attribute_settable(attribute_name=attribute_name):
             return False
 
-        cmds.addAttr('{}.{}'.format(self.obj, attribute_name), edit=True, defaultValue=default_value)
-        cmds.setAttr('{}.{}'.format(self.obj, attribute_name), default_value)
+        plug = self._plug(attribute_name)
+        cmds.addAttr(plug, edit=True, defaultValue=default_value)
+        self._set_attr(plug, default_value)
 
     def set_attributes_default_values(self, attribute_list=None):
         """
@@ -165,43 +681,142 @@ class AttributeHelper(object):
             attribute_list (list): Attributes names. Defaults to keyable attributes
         """
 
+        self._check_exists()
+
         if not attribute_list:
             attribute_list = self.get_keyable_attributes()
 
-        for attr in attribute_list:
-            if self.is_attribute_settable(attribute_name=attr):
-                cmds.setAttr('{}.{}'.format(self.obj, attr), self.get_default_value_attribute(attribute_name=attr))
+        get_attr = cmds.getAttr
+
+        # The writes are queued, the undo chunk and evaluation suspension only happen when something changes
+        with self.batch():
+            for attr in attribute_list:
+                if not self.is_attribute_settable(attribute_name=attr):
+                    continue
+                plug = self._plug(attr)
+                default_value = self._get_default_value(attribute_name=attr)
+                # Skip the write, and its dirty propagation, when the value is already the default
+                if not _values_match(get_attr(plug), default_value):
+                    self._set_attr(plug, default_value)
 
     def set_user_define_attributes_default_values(self):
         """
         Set user define attributes to default value
         """
 
-        if not self.get_user_define_attributes():
+        self._check_exists()
+
+        user_define_attributes = self.get_user_define_attributes()
+        if not user_define_attributes:
+            return
+
+        # openMaya is used to read types and default values without a Maya command per attribute
+        dependency_node = self._get_dependency_node()
+        node_object = dependency_node.object()
+        set_attr = self._set_attr
+
+        # The writes are queued, the undo chunk and evaluation suspension only happen when something changes
+        with self.batch():
+            for attr in user_define_attributes:
+                plug = self._plug(attr)
+                attribute_object = dependency_node.attribute(attr)
+
+                if attribute_object.hasFn(OpenMaya.MFn.kMessageAttribute):
+                    continue
+                if attribute_object.hasFn(OpenMaya.MFn.kTypedAttribute):
+                    continue
+
+                default_value = _get_api_default_value(attribute_object)
+
+                # Attribute types not covered by the API wrappers are queried with Maya commands
+                if default_value is None:
+                    attribute_type = cmds.getAttr(plug, type=True)
+                    if attribute_type in ('message', 'string'):
+                        continue
+                    if not cmds.getAttr(plug, settable=True):
+                        continue
+                    default_value = self._get_default_value(attribute_name=attr, attribute_type=attribute_type)
+                    if not _values_match(cmds.getAttr(plug), default_value):
+                        set_attr(plug, default_value)
+                    continue
+
+                api_plug = OpenMaya.MPlug(node_object, attribute_object)
+                if api_plug.isFreeToChange() != OpenMaya.MPlug.kFreeToChange:
+                    continue
+                # Skip the write, and its dirty propagation, when the value is already the default
+                if not _values_match(_get_plug_value(api_plug, plug), default_value):
+                    set_attr(plug, default_value)
+
+    def set_attribute_flags(self, attribute_name, lock=None, keyable=None, channel_box=None):
+        """
+        Set lock, keyable and channel box properties of an attributes with a single setAttr
+
+        Notes:
+            Only the flags that are not None are sent to Maya.
+            The call is idempotent, flags already in the requested state of the plug are not written, so no
+            attributeChanged callbacks are triggered for them. Inside a batch, the flags of plugs with
+            queued writes are always written
+
+        Args:
+            attribute_name (str): Attribute name
+            lock (bool): Optional. Lock state
+            keyable (bool): Optional. Keyable state
+            channel_box (bool): Optional. Channel box display state
+        """
+
+        self._check_exists()
+
+        if not self.attribute_exists(attribute_name=attribute_name):
+            return False
+
+        flags = {}
+        if lock is not None:
+            flags['lock'] = lock
+        if keyable is not None:
+            flags['keyable'] = keyable
+        if channel_box is not None:
+            flags['channelBox'] = channel_box
+
+        if not flags:
             return
 
-        for attr in self.get_user_define_attributes():
-            if cmds.getAttr('{}.{}'.format(self.obj, attr), type=True) == 'message':
-                continue
-            if cmds.getAttr('{}.{}'.format(self.obj, attr), type=True) == 'string':
-                continue
-            if self.is_attribute_settable(attribute_name=attr):
-                cmds.setAttr('{}.{}'.format(self.obj, attr),
-                             self.get_default_value_attribute(attribute_name=attr))
+        # Queued batch writes are not in the plug yet, plugs with queued writes can not be compared
+        plug_name = self._plug(attribute_name)
+        if not self._is_queued(plug_name):
+            # The plug state is read live, changes done outside the helper are never missed
+            plug = self._get_api_plug(attribute_name=attribute_name)
+            current_flags = {'lock': plug.isLocked,
+                             'keyable': plug.isKeyable,
+                             'channelBox': plug.isChannelBox}
+            changed_flags = dict((flag, value) for flag, value in flags.items()
+                                 if bool(value) != current_flags[flag])
+
+            # The channel box flag only applies to non keyable attributes, it is kept when keyable changes
+            if 'keyable' in changed_flags and 'channelBox' in flags:
+                changed_flags['channelBox'] = flags['channelBox']
+
+            if not changed_flags:
+                return
+            flags = changed_flags
+
+        self._set_attr(plug_name, **flags)
+
+        # Plugs stay valid, only the listAttr states are queried again
+        self._attr_cache = None
 
     def set_attribute_keyable(self, attribute_name, keyable=True):
         """
         Set attributes property between keyable and not keyable
 
+        Notes:
+            Nothing is written when the keyable state already matches
+
         Args:
             attribute_name (str): Attribute name
             keyable (bool): Defaults to True
         """
 
-        if self.attribute_exists(attribute_name=attribute_name):
-            return False
-
-        cmds.setAttr('{}.{}'.format(self.obj, attribute_name), keyable=keyable, channelBox=not keyable)
+        return self.set_attribute_flags(attribute_name=attribute_name, keyable=keyable, channel_box=not keyable)
 
     def set_attributes_keyable(self, attribute_list, keyable=True):
         """
@@ -212,22 +827,25 @@ class AttributeHelper(object):
             keyable (bool): Defaults to True
         """
 
-        for attr in attribute_list:
-            self.set_attribute_keyable(attribute_name=attr, keyable=keyable)
+        self._check_exists()
+
+        with self.batch():
+            for attr in attribute_list:
+                self.set_attribute_keyable(attribute_name=attr, keyable=keyable)
 
     def lock_attribute(self, attribute_name, lock=True):
         """
         Lock an attributes
 
+        Notes:
+            Nothing is written when the attribute is already in the requested lock state
+
         Args:
             attribute_name (str): Attribute name to lock.
             lock (bool): Defaults to True
         """
 
-        if not self.attribute_exists(attribute_name=attribute_name):
-            return False
-
-        cmds.setAttr('{}.{}'.format(self.obj, attribute_name), lock=lock)
+        return self.set_attribute_flags(attribute_name=attribute_name, lock=lock)
 
     def lock_attributes(self, attributes_list, lock=True):
         """
@@ -238,22 +856,54 @@ class AttributeHelper(object):
             lock (bool): Defaults to True
         """
 
-        for attr in attributes_list:
-            self.lock_attribute(attribute_name=attr, lock=lock)
+        self._check_exists()
+
+        with self.batch():
+            for attr in attributes_list:
+                self.lock_attribute(attribute_name=attr, lock=lock)
+
+    def toggle_lock_attribute(self, attribute_name):
+        """
+        Toggle the lock state of an attributes
+
+        Args:
+            attribute_name (str): Attribute name to toggle.
+
+        Returns:
+            bool. New lock state
+        """
+
+        self._check_exists()
+
+        plug = self._plug(attribute_name)
+        locked = self._get_api_plug(attribute_name=attribute_name).isLocked
+
+        # Inside a batch the last queued lock flag is the state the plug will have
+        if self._is_queued(plug):
+            for queued_plug, _, kwargs in reversed(self._batch_writes):
+                if queued_plug == plug and 'lock' in kwargs:
+                    locked = kwargs['lock']
+                    break
+
+        lock = not locked
+        self._set_attr(plug, lock=lock)
+        self.invalidate_cache()
+
+        return lock
 
     def hide_attribute(self, attribute_name, hide=True):
         """
         Hide attributes from channel Box
 
+        Notes:
+            Nothing is written when the attribute is already hidden or shown as requested
+
         Args:
             attribute_name (str): Attribute name to hide.
             hide (bool): Defaults to True
         """
 
-        if not self.attribute_exists(attribute_name=attribute_name):
-            return
-
-        cmds.setAttr('{}.{}'.format(self.obj, attribute_name), keyable=not hide, channelBox=not hide)
+        return self.set_attribute_flags(attribute_name=attribute_name, keyable=not hide, channel_box=not hide)
 
     def hide_attributes(self, attributes_list, hide=True):
         """
@@ -264,21 +914,29 @@ class AttributeHelper(object):
             hide (bool): Defaults to True
         """
 
-        for attr in attributes_list:
-            self.hide_attribute(attribute_name=attr, hide=hide)
+        self._check_exists()
+
+        with self.batch():
+            for attr in attributes_list:
+                self.hide_attribute(attribute_name=attr, hide=hide)
 
     def lock_and_hide_attribute(self, attribute_name, lock=True, hide=True):
         """
         Lock and hide an attributes
 
+        Notes:
+            Only the lock and visibility flags that differ from the current state are written
+
         Args:
             attribute_name (str): Attribute name to lock and hide
             lock (bool): Defaults to True
             hide (bool): Defaults to True
         """
 
-        self.lock_attribute(attribute_name=attribute_name, lock=lock)
-        self.hide_attribute(attribute_name=attribute_name, hide=hide)
+        return self.set_attribute_flags(attribute_name=attribute_name,
+                                        lock=lock,
+                                        keyable=not hide,
+                                        channel_box=not hide)
 
     def lock_and_hide_attributes(self, attributes_list, lock=True, hide=True):
         """
@@ -290,8 +948,11 @@ class AttributeHelper(object):
             hide (bool): Defaults to True
         """
 
-        for attr in attributes_list:
-            self.lock_and_hide_attribute(attribute_name=attr, lock=lock, hide=hide)
+        self._check_exists()
+
+        with self.batch():
+            for attr in attributes_list:
+                self.lock_and_hide_attribute(attribute_name=attr, lock=lock, hide=hide)
 
     def set_reference_display(self, enabled=True):
         """
@@ -301,11 +962,22 @@ class AttributeHelper(object):
             enabled (bool): Defaults to True
         """
 
+        self._check_exists()
+
         # normal as 0 or reference as 2
         override_type = 2 if enabled else 0
 
-        cmds.setAttr('{}.overrideEnabled'.format(self.obj), enabled)
-        cmds.setAttr('{}.overrideDisplayType'.format(self.obj), override_type)
+        enabled_plug = self._plug('overrideEnabled')
+        display_type_plug = self._plug('overrideDisplayType')
+
+        # Only the override values that change are written, both in a single undo step
+        with self.batch():
+            if (self._is_queued(enabled_plug) or
+                    self._get_api_plug(attribute_name='overrideEnabled').asBool() != bool(enabled)):
+                self._set_attr(enabled_plug, enabled)
+            if (self._is_queued(display_type_plug) or
+                    self._get_api_plug(attribute_name='overrideDisplayType').asInt() != override_type):
+                self._set_attr(display_type_plug, override_type)
 
     # ---------- Get Methods ----------
     def get_user_define_attributes(self):
@@ -342,10 +1014,27 @@ class AttributeHelper(object):
         if not self.attribute_exists(attribute_name=attribute_name):
             return
 
-        if cmds.getAttr('{}.{}'.format(self.obj, attribute_name), type=True) == 'message':
+        return self._get_default_value(attribute_name=attribute_name)
+
+    def _get_default_value(self, attribute_name, attribute_type=None):
+        """
+        Get default value from an Attribute without checking if it exists
+
+        Args:
+            attribute_name (str): Attribute name
+            attribute_type (str): Optional. Attribute type if already queried
+
+        Returns:
+            value
+        """
+
+        if attribute_type is None:
+            attribute_type = cmds.getAttr(self._plug(attribute_name), type=True)
+
+        if attribute_type == 'message':
             raise ValueError('message type attributes does not have default values')
 
-        if cmds.getAttr('{}.{}'.format(self.obj, attribute_name), type=True) == 'string':
+        if attribute_type == 'string':
             raise ValueError('string type attributes does not have default values')
 
         return cmds.attributeQuery(attribute_name, node=self.obj, listDefault=True)[0]
@@ -359,13 +1048,22 @@ class AttributeHelper(object):
             **kwargs:
 
         Returns:
-            value
+            value or None if the attribute does not exist
         """
 
-        if not self.attribute_exists(attribute_name=attribute_name):
+        # Query flags are only supported by getAttr, a missing plug is reported by Maya as a ValueError
+        if kwargs:
+            try:
+                return cmds.getAttr(self._plug(attribute_name), **kwargs)
+            except ValueError:
+                return
+
+        try:
+            plug = self._get_api_plug(attribute_name=attribute_name)
+        except RuntimeError:
             return
 
-        return cmds.getAttr('{}.{}'.format(self.obj, attribute_name), **kwargs)
+        return _get_plug_value(plug, self._plug(attribute_name))
 
     def get_attributes_values(self, attributes_list):
         """
@@ -381,7 +1079,7 @@ class AttributeHelper(object):
 
         attributes_values = {}
 
-        # Store attributes values in a dictionary
+        # Store attributes values in a dictionary, plugs are read with openMaya
         for attr in attributes_list:
             attributes_values[attr] = self.get_attribute_value(attribute_name=attr)
 
@@ -398,10 +1096,12 @@ class AttributeHelper(object):
             type.
         """
 
-        if not self.attribute_exists(attribute_name=attribute_name):
+        try:
+            plug = self._get_api_plug(attribute_name=attribute_name)
+        except RuntimeError:
             return
 
-        return cmds.getAttr('{}.{}'.format(self.obj, attribute_name), type=True)
+        return _get_plug_type(plug, self._plug(attribute_name))
 
     def get_attributes_type(self, attributes_list):
         """
@@ -435,10 +1135,13 @@ class AttributeHelper(object):
             str. attribute_name
         """
 
+        self._check_exists()
+
         if self.attribute_exists(attribute_name=attribute_name):
             raise RuntimeError('Attribute: "{}" already exists in object: "{}"'.format(attribute_name, self.obj))
 
         cmds.addAttr(self.obj, longName=attribute_name, **kwargs)
+        self.invalidate_cache()
 
         return attribute_name
 
@@ -454,12 +1157,13 @@ class AttributeHelper(object):
         """
 
         self.add_attribute(attribute_name=separator_name,
-                           channelBox=True,
                            niceName=' ',
                            attributeType='enum',
                            enumName=separator_name)
-        self.set_attribute_keyable(attribute_name=separator_name, keyable=False)
-        self.lock_attribute(attribute_name=separator_name)
+
+        # addAttr has no channelBox flag, show it and lock it with a single setAttr
+        self._set_attr(self._plug(separator_name), keyable=False, channelBox=True, lock=True)
+        self.invalidate_cache()
 
         return separator_name
 
@@ -546,7 +1250,7 @@ class AttributeHelper(object):
         """
 
         self.add_attribute(attribute_name, dataType='string')
-        cmds.setAttr('{}.{}'.format(self.obj, attribute_name), text, type='string')
+        self._set_attr(self._plug(attribute_name), text, type='string')
 
         return attribute_name
 
@@ -562,7 +1266,10 @@ class AttributeHelper(object):
             str. attribute_name
         """
 
+        self._check_exists()
+
         cmds.addAttr(self.obj, longName=attribute_name, proxy=proxy)
+        self.invalidate_cache()
 
         return attribute_name
 
@@ -570,22 +1277,73 @@ class AttributeHelper(object):
         """
         Remove an attributes from object
 
+        Notes:
+            The attribute is deleted immediately, also inside a batch
+
         Args:
             attribute_name (str): Attribute name to remove
             **kwargs:
 
+        Raises:
+            RuntimeError: when the attribute has writes queued in the open batch
+
         """
 
-        if not self.attribute_exists(attribute_name=attribute_name):
-            raise RuntimeError('Attribute: "{}" no exists in object: "{}"'.format(attribute_name, self.obj))
+        self._check_exists()
+
+        # The queued writes would fail when the batch is written
+        if self._is_queued(self._plug(attribute_name)):
+            raise RuntimeError('Attribute: "{}" has queued writes in object: "{}"'.format(attribute_name, self.obj))
 
-        self.lock_attribute(attribute_name=attribute_name, lock=False)
+        # Existence and lock state come from a single plug lookup
+        if self._get_api_plug(attribute_name=attribute_name).isLocked:
+            cmds.setAttr(self._plug(attribute_name), lock=False)
 
         cmds.deleteAttr(self.obj, attribute=attribute_name, **kwargs)
+        self.invalidate_cache()
 
 
 # ---------- Connection Attributes Methods ----------
 
+def _connect_many(pairs, attributes, force=True):
+    """
+    Connect compound attributes from each source to its target skipping the children locked in the target
+
+    Note:
+        Every axis is connected on its own child plug, source.translateX -> target.translateX, ...
+        so a single axis can be disconnected later without touching the others.
+        All the connections are done inside a single undo chunk with the cycle check disabled
+
+    Args:
+        pairs (list): Source and target names, [(source, target), ...]
+        attributes (tuple): Compound attribute names to connect, 'translate', 'rotate' or 'scale'
+        force (bool): Force connections. Defaults to True
+    """
+
+    if not pairs:
+        return
+
+    cycle_check = cmds.cycleCheck(query=True, evaluation=True)
+
+    # Local names avoid the global and attribute lookups in every iteration
+    connect_attr = cmds.connectAttr
+    list_attr = cmds.listAttr
+
+    with undo_chunk():
+        cmds.cycleCheck(evaluation=False)
+        try:
+            for source, target in pairs:
+                # Locked attributes of the target in a single query
+                locked = set(list_attr(target, locked=True) or [])
+
+                for attr in attributes:
+                    for child, child_suffix in zip(_COMPOUND_CHILDREN[attr], _COMPOUND_PLUG_SUFFIXES[attr]):
+                        if child not in locked:
+                            connect_attr(source + child_suffix, target + child_suffix, force=force)
+        finally:
+            cmds.cycleCheck(evaluation=cycle_check)
+
+
 def connect_trs(source, target, force=True):
     """
     Connect translation, rotation and scale from source to target
@@ -596,15 +1354,7 @@ def connect_trs(source, target, force=True):
         force (bool): Force connections. Defaults to True
     """
 
-    for attr in ('translate', 'rotate', 'scale'):
-        for axis in ('X', 'Y', 'Z'):
-            source_ah = AttributeHelper(source)
-            target_ah = AttributeHelper(target)
-            if not source_ah.is_attribute_locked(
-                    attribute_name='{}{}'.format(attr, axis)) and not target_ah.is_attribute_locked(
-                attribute_name='{}{}'.format(attr, axis)):
-                cmds.connectAttr('{}.{}{}'.format(source, attr, axis), '{}.{}{}'.format(target, attr, axis),
-                                 force=force)
+    _connect_many([(source, target)], _TRS_ATTRS, force=force)
 
 
 def connect_translate(source, target, force=True):
@@ -617,12 +1367,7 @@ def connect_translate(source, target, force=True):
         force (bool): Force connections. Defaults to True
     """
 
-    target_ah = AttributeHelper(target)
-    for axis in ('X', 'Y', 'Z'):
-        if not target_ah.is_attribute_locked(attribute_name='translate{}'.format(axis)):
-            cmds.connectAttr('{}.translate{}'.format(source, axis),
-                             '{}.translate{}'.format(target, axis),
-                             force=force)
+    _connect_many([(source, target)], ('translate',), force=force)
 
 
 def connect_rotate(source, target, force=True):
@@ -635,12 +1380,7 @@ def connect_rotate(source, target, force=True):
         force (bool): Force connections. Defaults to True
     """
 
-    target_ah = AttributeHelper(target)
-    for axis in ('X', 'Y', 'Z'):
-        if not target_ah.is_attribute_locked(attribute_name='rotate{}'.format(axis)):
-            cmds.connectAttr('{}.rotate{}'.format(source, axis),
-                             '{}.rotate{}'.format(target, axis),
-                             force=force)
+    _connect_many([(source, target)], ('rotate',), force=force)
 
 
 def connect_scale(source, target, force=True):
@@ -653,18 +1393,87 @@ def connect_scale(source, target, force=True):
         force (bool): Force connections. Defaults to True
     """
 
-    target_ah = AttributeHelper(target)
-    for axis in ('X', 'Y', 'Z'):
-        if not target_ah.is_attribute_locked(attribute_name='scale{}'.format(axis)):
-            cmds.connectAttr('{}.scale{}'.format(source, axis),
-                             '{}.scale{}'.format(target, axis),
-                             force=force)
+    _connect_many([(source, target)], ('scale',), force=force)
+
+
+def connect_trs_many(pairs, force=True):
+    """
+    Connect translation, rotation and scale from many sources to their targets
+
+    Note:
+        Viewport refresh and parallel evaluation are suspended while connecting many pairs,
+        prefer it over calling connect_trs in a loop
+
+    Args:
+        pairs (list): Source and target names, [(source, target), ...]
+        force (bool): Force connections. Defaults to True
+    """
+
+    pairs = list(pairs)
+    with _edit_context(len(pairs)):
+        _connect_many(pairs, _TRS_ATTRS, force=force)
+
+
+def connect_translate_many(pairs, force=True):
+    """
+    Connect translation from many sources to their targets
+
+    Note:
+        Viewport refresh and parallel evaluation are suspended while connecting many pairs
+
+    Args:
+        pairs (list): Source and target names, [(source, target), ...]
+        force (bool): Force connections. Defaults to True
+    """
+
+    pairs = list(pairs)
+    with _edit_context(len(pairs)):
+        _connect_many(pairs, ('translate',), force=force)
+
+
+def connect_rotate_many(pairs, force=True):
+    """
+    Connect rotation from many sources to their targets
+
+    Note:
+        Viewport refresh and parallel evaluation are suspended while connecting many pairs
+
+    Args:
+        pairs (list): Source and target names, [(source, target), ...]
+        force (bool): Force connections. Defaults to True
+    """
+
+    pairs = list(pairs)
+    with _edit_context(len(pairs)):
+        _connect_many(pairs, ('rotate',), force=force)
+
+
+def connect_scale_many(pairs, force=True):
+    """
+    Connect scale from many sources to their targets
+
+    Note:
+        Viewport refresh and parallel evaluation are suspended while connecting many pairs
+
+    Args:
+        pairs (list): Source and target names, [(source, target), ...]
+        force (bool): Force connections. Defaults to True
+    """
+
+    pairs = list(pairs)
+    with _edit_context(len(pairs)):
+        _connect_many(pairs, ('scale',), force=force)
 
 
 def delete_connection(node, attribute_name):
     """
     Delete connection between two nodes
 
+    Notes:
+        The connect functions of this module connect every axis on its own child plug, deleting the connection
+        of one axis keeps the others. When the attribute is a child of a connected compound, the connection
+        of the whole compound is deleted
+
     Args:
         node (str): Node name
         attribute_name (str): Name of the input or output connection attributes
@@ -675,12 +1484,14 @@ def delete_connection(node, attribute_name):
     if not ah.attribute_exists(attribute_name=attribute_name):
         raise RuntimeError('Attribute: "{}" no exists in object: "{}"'.format(attribute_name, node))
 
-    if cmds.connectionInfo('{}.{}'.format(node, attribute_name), isDestination=True):
-        plug = cmds.connectionInfo('{}.{}'.format(node, attribute_name), getExactDestination=True)
-        read_only = cmds.ls(plug, readOnly=True)
-        # Delete input connections if destination attr is read only
-        if read_only:
-            source = cmds.connectionInfo(plug, sourceFromDestination=True)
-            cmds.disconnectAttr(source, plug)
-        else:
-            cmds.delete(plug, inputConnectionsAndNodes=True)
+    # Empty when neither the plug nor its ancestors are the destination of a connection
+    plug = cmds.connectionInfo(ah._plug(attribute_name), getExactDestination=True)
+    if not plug:
+        return
+
+    # Delete input connections if destination attr is read only
+    if cmds.ls(plug, readOnly=True):
+        source = cmds.connectionInfo(plug, sourceFromDestination=True)
+        cmds.disconnectAttr(source, plug)
+    else:
+        cmds.delete(plug, inputConnectionsAndNodes=True)
@@ -1,4 +1,25 @@
+from contextlib import contextmanager
+
 from maya import cmds
+from maya.api import OpenMaya
+from maya.api import OpenMayaAnim
+
+from rig_helpers.matrix.lib import node_exists
+from rig_helpers.utils.lib import suspend_refresh
+
+
+# Tangent type names as used by setKeyframe and their key attribute values
+_TANGENT_TYPES = {'fixed': OpenMayaAnim.MFnAnimCurve.kTangentFixed,
+                  'linear': OpenMayaAnim.MFnAnimCurve.kTangentLinear,
+                  'flat': OpenMayaAnim.MFnAnimCurve.kTangentFlat,
+                  'step': OpenMayaAnim.MFnAnimCurve.kTangentStep,
+                  'slow': OpenMayaAnim.MFnAnimCurve.kTangentSlow,
+                  'fast': OpenMayaAnim.MFnAnimCurve.kTangentFast,
+                  'spline': OpenMayaAnim.MFnAnimCurve.kTangentSmooth,
+                  'clamped': OpenMayaAnim.MFnAnimCurve.kTangentClamped,
+                  'plateau': OpenMayaAnim.MFnAnimCurve.kTangentPlateau,
+                  'stepnext': OpenMayaAnim.MFnAnimCurve.kTangentStepNext,
+                  'auto': OpenMayaAnim.MFnAnimCurve.kTangentAuto}
 
 
 class CurveHelper(object):
@@ -25,6 +46,81 @@ class CurveHelper(object):
         return False
 
 
+@contextmanager
+def _preserve_selection():
+    """
+    Restore the current selection when the context exits
+    """
+
+    selection = cmds.ls(selection=True, long=True)
+    try:
+        yield
+    finally:
+        # Nodes deleted inside the context are skipped
+        selection = cmds.ls(selection, long=True) if selection else []
+        if selection:
+            cmds.select(selection, replace=True)
+        else:
+            cmds.select(clear=True)
+
+
+def _get_selection_list(node):
+    """
+    Get an openMaya selection list with the node
+
+    Args:
+        node (str): Name of the node
+
+    Raises:
+        ValueError: when the node does not exit
+
+    Returns:
+        OpenMaya.MSelectionList
+    """
+
+    selection = OpenMaya.MSelectionList()
+    try:
+        selection.add(node)
+    except RuntimeError:
+        # Raises the missing node error, names matching several nodes keep the Maya error
+        node_exists(node)
+        raise
+
+    return selection
+
+
+def _resolve_curve_shape(node):
+    """
+    Get the dag path of the curve shape of a node
+
+    Notes:
+        Works with both transform and curve shape
+
+    Args:
+        node (str): Name of the curve
+
+    Raises:
+        ValueError: when the node does not exit or is not a curve
+
+    Returns:
+        OpenMaya.MDagPath
+    """
+
+    try:
+        dag_path = _get_selection_list(node).getDagPath(0)
+    except TypeError:
+        # Dependency nodes have no dag path
+        raise ValueError('node "{}" is not a nurbsCurve'.format(node))
+
+    # Extend transforms to their first shape
+    if not dag_path.hasFn(OpenMaya.MFn.kNurbsCurve) and dag_path.numberOfShapesDirectlyBelow():
+        dag_path.extendToShape(0)
+
+    if not dag_path.hasFn(OpenMaya.MFn.kNurbsCurve):
+        raise ValueError('node "{}" is not a nurbsCurve'.format(node))
+
+    return dag_path
+
 
 def is_nurbs_curve(crv):
     """
@@ -37,11 +133,8 @@ def is_nurbs_curve(crv):
         bool
     """
 
-    # Checks
-    node_exists(crv)
-
     # Check object type
-    if cmds.objectType(crv) != 'nurbsCurve':
+    if _get_selection_list(crv).getDependNode(0).apiType() != OpenMaya.MFn.kNurbsCurve:
         return False
 
     return True
@@ -63,17 +156,7 @@ def get_cvs_number(node):
 
     """
 
-    # Checks
-    node_exists(node)
-
-    # Get the nurbs curve
-    crv = node
-    if not is_nurbs_curve(crv=crv):
-        crv = cmds.listRelatives(node, shapes=True)[0]
-        if not is_nurbs_curve(crv=crv):
-            raise ValueError('node "{}" is not a nurbsCurve'.format(node))
-
-    return cmds.getAttr('{}.cp'.format(crv), size=True)
+    return OpenMaya.MFnNurbsCurve(_resolve_curve_shape(node)).numCVs
 
 
 def get_curve_length(node):
@@ -92,17 +175,10 @@ def get_curve_length(node):
 
     """
 
-    # Checks
-    node_exists(node)
+    length = OpenMaya.MFnNurbsCurve(_resolve_curve_shape(node)).length()
 
-    # Get the nurbs curve
-    crv = node
-    if not is_nurbs_curve(crv=crv):
-        crv = cmds.listRelatives(node, shapes=True)[0]
-        if not is_nurbs_curve(crv=crv):
-            raise ValueError('node "{}" is not a nurbsCurve'.format(node))
-
-    return cmds.arclen(crv)
+    # openMaya works in centimeters, return the length in UI units as arclen does
+    return OpenMaya.MDistance(length, OpenMaya.MDistance.kCentimeters).asUnits(OpenMaya.MDistance.uiUnit())
 
 
 def create_curve_from_points(points, name, world_space=True, **kwargs):
@@ -148,18 +224,16 @@ def convert_to_bezier(node):
         curve
     """
 
-    # Checks
-    node_exists(node)
-
     # Get shape
-    shape = cmds.listRelatives(node, shapes=True)[0]
+    shape_path = _resolve_curve_shape(node)
 
     # Convert to bezier curve
-    if cmds.nodeType(shape) == 'bezierCurve':
+    if shape_path.apiType() == OpenMaya.MFn.kBezierCurve:
         return
 
-    if cmds.nodeType(shape) == 'nurbsCurve':
-        cmds.select(shape)
+    # nurbsCurveToBezier works on the selection, restore the user selection afterwards
+    with _preserve_selection(), suspend_refresh():
+        cmds.select(shape_path.fullPathName(), replace=True)
         cmds.nurbsCurveToBezier()
 
 
@@ -181,31 +255,43 @@ def get_nearest_point_on_curve(node, source, world_space=True):
 
     """
 
-    # Checks
-    node_exists(node)
-    node_exists(source)
+    # openMaya finds the closest point without creating a temporary nearestPointOnCurve node
+    curve_fn = OpenMaya.MFnNurbsCurve(_resolve_curve_shape(node))
+    source_path = _get_selection_list(source).getDagPath(0)
+
+    if world_space:
+        source_pos = OpenMaya.MTransformationMatrix(source_path.inclusiveMatrix()).translation(OpenMaya.MSpace.kWorld)
+    else:
+        source_pos = OpenMaya.MFnTransform(source_path).translation(OpenMaya.MSpace.kTransform)
 
-    # Get the nurbs curve
-    crv = node
-    if not is_nurbs_curve(crv=crv):
-        crv = cmds.listRelatives(node, shapes=True)[0]
-        if not is_nurbs_curve(crv=crv):
-            raise ValueError('node "{}" is not a nurbsCurve'.format(node))
+    point, param = curve_fn.closestPoint(OpenMaya.MPoint(source_pos), space=OpenMaya.MSpace.kWorld)
 
-    source_pos = cmds.xform(source, query=True, translation=True, worldSpace=world_space)
+    # openMaya works in centimeters, return the position in UI units as the node attributes did
+    ui_unit = OpenMaya.MDistance.uiUnit()
+    position = tuple(OpenMaya.MDistance(value, OpenMaya.MDistance.kCentimeters).asUnits(ui_unit)
+                     for value in (point.x, point.y, point.z))
 
-    # Create the nearestPoint
-    temp_npc = cmds.createNode('nearestPointOnCurve')
+    return {'position': position, 'parameter': param}
 
-    # Get the values
-    cmds.connectAttr('{}.worldSpace'.format(crv), '{}.inputCurve'.format(temp_npc))
-    cmds.setAttr('{}.inPosition'.format(temp_npc), source_pos[0], source_pos[1], source_pos[2], type='double3')
-    position = cmds.getAttr('{}.position'.format(temp_npc))[0]
-    param = cmds.getAttr('{}.parameter'.format(temp_npc))
 
-    cmds.delete(temp_npc)
+def _get_tangent_type(tangent_type):
+    """
+    Get the value of a tangent type for the animation curve key attributes
 
-    return {'position': position, 'parameter': param}
+    Args:
+        tangent_type (str): Fixed, Linear, Flat, Step, Slow, Fast, Spline, Clamped, Plateau, StepNext, Auto
+
+    Raises:
+        ValueError: when the tangent type is not valid
+
+    Returns:
+        (int) tangent type
+    """
+
+    try:
+        return _TANGENT_TYPES[tangent_type.lower()]
+    except KeyError:
+        raise ValueError('tangent type "{}" is not valid'.format(tangent_type))
 
 
 def create_animation_curve(name, values=None, in_tangent_type='linear', out_tangent_type='linear'):
@@ -235,13 +321,16 @@ def create_animation_curve(name, values=None, in_tangent_type='linear', out_tang
 
     anim_curve = cmds.createNode('animCurveUL', name=name)
 
-    # Set values for animation curve
+    # Set values for animation curve, all the keys are written with one setAttr per key array
     if values and isinstance(values, dict):
-        for key, value in values.items():
-            cmds.setKeyframe(anim_curve,
-                             float=key,
-                             value=value,
-                             inTangentType=in_tangent_type,
-                             outTangentType=out_tangent_type)
+        keys = sorted(values.items())
+        keys_range = '[0:{}]'.format(len(keys) - 1)
+        in_tangent = _get_tangent_type(in_tangent_type)
+        out_tangent = _get_tangent_type(out_tangent_type)
+
+        cmds.setAttr('{}.keyTimeValue{}'.format(anim_curve, keys_range),
+                     *[item for key in keys for item in key], size=len(keys))
+        cmds.setAttr('{}.keyTanInType{}'.format(anim_curve, keys_range), *[in_tangent] * len(keys), size=len(keys))
+        cmds.setAttr('{}.keyTanOutType{}'.format(anim_curve, keys_range), *[out_tangent] * len(keys), size=len(keys))
 
     return anim_curve
@@ -1,11 +1,60 @@
+import os
+
 from maya import cmds
 from maya.api import OpenMaya
 
+from rig_helpers.utils.lib import clear_node_cache, get_node_object, has_name, suspend_refresh, undo_chunk
+
 
-IDENTITY_MATRIX = [1.0, 0.0, 0.0, 0.0,
+# Tuple so the shared constant can not be modified by the callers
+IDENTITY_MATRIX = (1.0, 0.0, 0.0, 0.0,
                    0.0, 1.0, 0.0, 0.0,
                    0.0, 0.0, 1.0, 0.0,
-                   0.0, 0.0, 0.0, 1.0]
+                   0.0, 0.0, 0.0, 1.0)
+
+
+# Node existence checks of the module functions, disable them with RIGGING_LIB_CHECKS=0 in validated pipelines
+DEBUG_CHECKS = os.environ.get('RIGGING_LIB_CHECKS', '1') == '1'
+
+# Major version of the running Maya, queried once when it is needed
+_MAYA_VERSION = None
+
+# numpy module, imported the first time many matrices are multiplied. False when it is not available
+_NUMPY = None
+
+# Dag paths of the nodes found in the scene keyed by node name, validated every time they are used
+_DAG_PATHS = {}
+
+
+def clear_node_exists_cache():
+    """
+    Clear the cached node handles and dag paths
+
+    Notes:
+        Cached nodes are validated when they are used, this only releases them
+    """
+
+    clear_node_cache()
+    _DAG_PATHS.clear()
+
+
+def _get_maya_version():
+    """
+    Get the major version of the running Maya
+
+    Notes:
+        The version does not change in a session, cmds.about is only called the first time
+
+    Returns:
+        (int) Maya version, ex 2022
+    """
+
+    global _MAYA_VERSION
+
+    if _MAYA_VERSION is None:
+        _MAYA_VERSION = int(cmds.about(version=True).split('.')[0])
+
+    return _MAYA_VERSION
 
 
 def node_exists(node):
@@ -13,6 +62,10 @@ def node_exists(node):
 
     Check if the node exists inside the current scene
 
+    Notes:
+        Existing nodes are cached while they are alive and keep their name, missing nodes are always queried.
+        Nothing is checked when DEBUG_CHECKS is False
+
     Args:
         node (str) : Name of the node to check
 
@@ -21,17 +74,78 @@ def node_exists(node):
 
     """
 
+    if not DEBUG_CHECKS:
+        return
+
+    # Names matching several nodes are not cached, they are checked with objExists
+    if get_node_object(node) is not None:
+        return
+
     if not cmds.objExists(node):
         raise ValueError('node "{}" does not exist in  the scene'.format(node))
 
 
-def get_position(node, **kwargs):
+def _get_dag_path(node):
+    """
+    Get the dag path of a node
+
+    Notes:
+        Dag paths are cached by node name, deleted, renamed and reparented nodes are resolved again
+
+    Args:
+        node (str): Name of the node
+
+    Returns:
+        OpenMaya.MDagPath
+    """
+
+    dag_path = _DAG_PATHS.get(node)
+    if dag_path is not None and dag_path.isValid() and has_name(node, dag_path.node()):
+        return dag_path
+
+    selection = OpenMaya.MSelectionList()
+    selection.add(node)
+    dag_path = selection.getDagPath(0)
+
+    _DAG_PATHS[node] = dag_path
+
+    return dag_path
+
+
+def _get_world_transformation(node):
+    """
+    Get the world transformation matrix of a node with openMaya
+
+    Notes:
+        The rotation of the transformation matrix uses the rotate order of the node
+
+    Args:
+        node (str): Name of the node
+
+    Returns:
+        OpenMaya.MTransformationMatrix
+    """
+
+    dag_path = _get_dag_path(node)
+
+    transformation = OpenMaya.MTransformationMatrix(dag_path.inclusiveMatrix())
+    if dag_path.hasFn(OpenMaya.MFn.kTransform):
+        transformation.reorderRotation(OpenMaya.MFnTransform(dag_path).rotationOrder())
+
+    return transformation
+
+
+def get_position(node, skip_check=False, **kwargs):
     """
 
     Get world space position of a node
 
+    Notes:
+        Read with openMaya, cmds.xform is only used when kwargs are given
+
     Args:
         node (str): Name of the node
+        skip_check (bool): Optional. Skip the node existence check. Defaults to False
         **kwargs:
 
     Returns:
@@ -40,20 +154,32 @@ def get_position(node, **kwargs):
     """
 
     # Checks
-    node_exists(node)
+    if not skip_check:
+        node_exists(node)
 
-    position = cmds.xform(node, query=True, translation=True, worldSpace=True, **kwargs)
+    if kwargs:
+        return cmds.xform(node, query=True, translation=True, worldSpace=True, **kwargs)
+
+    # openMaya reads the world matrix without running a Maya command, values are returned in UI units
+    translation = _get_world_transformation(node).translation(OpenMaya.MSpace.kWorld)
+    ui_unit = OpenMaya.MDistance.uiUnit()
+    position = [OpenMaya.MDistance(value, OpenMaya.MDistance.kCentimeters).asUnits(ui_unit)
+                for value in (translation.x, translation.y, translation.z)]
 
     return position
 
 
-def get_rotation(node, **kwargs):
+def get_rotation(node, skip_check=False, **kwargs):
     """
 
     Get world space rotation of a node
 
+    Notes:
+        Read with openMaya, cmds.xform is only used when kwargs are given
+
     Args:
         node (str): Name of the node
+        skip_check (bool): Optional. Skip the node existence check. Defaults to False
         **kwargs:
 
     Returns:
@@ -62,20 +188,32 @@ def get_rotation(node, **kwargs):
     """
 
     # Checks
-    node_exists(node)
+    if not skip_check:
+        node_exists(node)
 
-    rotation = cmds.xform(node, query=True, rotation=True, worldSpace=True, **kwargs)
+    if kwargs:
+        return cmds.xform(node, query=True, rotation=True, worldSpace=True, **kwargs)
+
+    # openMaya reads the world matrix without running a Maya command, values are returned in UI units
+    euler_rotation = _get_world_transformation(node).rotation()
+    ui_unit = OpenMaya.MAngle.uiUnit()
+    rotation = [OpenMaya.MAngle(value, OpenMaya.MAngle.kRadians).asUnits(ui_unit)
+                for value in (euler_rotation.x, euler_rotation.y, euler_rotation.z)]
 
     return rotation
 
 
-def get_scale(node, **kwargs):
+def get_scale(node, skip_check=False, **kwargs):
     """
 
     Get world space scale of a node
 
+    Notes:
+        Read with openMaya, cmds.xform is only used when kwargs are given
+
     Args:
         node (str): Name of the node
+        skip_check (bool): Optional. Skip the node existence check. Defaults to False
         **kwargs:
 
     Returns:
@@ -84,14 +222,19 @@ def get_scale(node, **kwargs):
     """
 
     # Checks
-    node_exists(node)
+    if not skip_check:
+        node_exists(node)
+
+    if kwargs:
+        return cmds.xform(node, query=True, scale=True, worldSpace=True, **kwargs)
 
-    scale = cmds.xform(node, query=True, scale=True, worldSpace=True, **kwargs)
+    # openMaya reads the world matrix without running a Maya command
+    scale = _get_world_transformation(node).scale(OpenMaya.MSpace.kWorld)
 
     return scale
 
 
-def get_matrix(node, **kwargs):
+def get_matrix(node, skip_check=False, **kwargs):
     """
 
     Get world space matrix of a node
@@ -101,6 +244,7 @@ def get_matrix(node, **kwargs):
 
     Args:
         node (str): Name of the node
+        skip_check (bool): Optional. Skip the node existence check. Defaults to False
         **kwargs:
 
     Returns:
@@ -111,14 +255,15 @@ def get_matrix(node, **kwargs):
     """
 
     # Checks
-    node_exists(node)
+    if not skip_check:
+        node_exists(node)
 
     matrix = cmds.xform(node, query=True, matrix=True, worldSpace=True, **kwargs)
 
     return matrix
 
 
-def set_position(node, position, **kwargs):
+def set_position(node, position, skip_check=False, **kwargs):
     """
 
     Set world space position of a node
@@ -126,17 +271,19 @@ def set_position(node, position, **kwargs):
     Args:
         node (str): Name of the node
         position (list): Axis X, Y, Z position of a point
+        skip_check (bool): Optional. Skip the node existence check. Defaults to False
         **kwargs:
 
     """
 
     # Checks
-    node_exists(node)
+    if not skip_check:
+        node_exists(node)
 
     cmds.xform(node, translation=position, absolute=True, worldSpace=True, **kwargs)
 
 
-def set_rotation(node, rotation, **kwargs):
+def set_rotation(node, rotation, skip_check=False, **kwargs):
     """
 
     Set world space rotation of a node
@@ -144,17 +291,19 @@ def set_rotation(node, rotation, **kwargs):
     Args:
         node (str): Name of the node
         rotation (list): Axis X, Y, Z rotation of a point
+        skip_check (bool): Optional. Skip the node existence check. Defaults to False
         **kwargs:
 
     """
 
     # Checks
-    node_exists(node)
+    if not skip_check:
+        node_exists(node)
 
     cmds.xform(node, rotation=rotation, absolute=True, worldSpace=True, **kwargs)
 
 
-def set_scale(node, scale, **kwargs):
+def set_scale(node, scale, skip_check=False, **kwargs):
     """
 
     Set world space scale of a node
@@ -162,17 +311,19 @@ def set_scale(node, scale, **kwargs):
     Args:
         node: str. Name of the node
         scale: list. X, Y, Z scale of a point
+        skip_check (bool): Optional. Skip the node existence check. Defaults to False
         **kwargs:
 
     """
 
     # Checks
-    node_exists(node)
+    if not skip_check:
+        node_exists(node)
 
     cmds.xform(node, scale=scale, absolute=True, worldSpace=True, **kwargs)
 
 
-def set_matrix(node, matrix, **kwargs):
+def set_matrix(node, matrix, skip_check=False, **kwargs):
     """
 
     Set world space matrix of a node
@@ -180,16 +331,37 @@ def set_matrix(node, matrix, **kwargs):
     Args:
         node (str): Name of the node
         matrix (list): Matrix is represented by 16 double arguments
+        skip_check (bool): Optional. Skip the node existence check. Defaults to False
         **kwargs:
 
     """
 
     # Checks
-    node_exists(node)
+    if not skip_check:
+        node_exists(node)
 
     cmds.xform(node, matrix=matrix, absolute=True, worldSpace=True, **kwargs)
 
 
+def _has_uniform_parent_scale(node, tolerance=1e-6):
+    """
+    Check if the parent space of a node has a uniform scale and no shear
+
+    Args:
+        node (str): Name of the node
+        tolerance (float): Optional. Maximum difference between the scale axes and maximum shear
+
+    Returns:
+        bool
+    """
+
+    parent_transform = OpenMaya.MTransformationMatrix(_get_dag_path(node).exclusiveMatrix())
+    scale = parent_transform.scale(OpenMaya.MSpace.kWorld)
+    shear = parent_transform.shear(OpenMaya.MSpace.kWorld)
+
+    return max(scale) - min(scale) <= tolerance and all(abs(value) <= tolerance for value in shear)
+
+
 def put_in_place(source, target, pos=True, rot=True, scl=False):
     """
 
@@ -208,17 +380,79 @@ def put_in_place(source, target, pos=True, rot=True, scl=False):
     node_exists(source)
     node_exists(target)
 
+    # Position and rotation are set with a single matrix query and set. The target world scale and shear only
+    # keep its local scale and shear when the parent has no shear and a uniform scale
+    if pos and rot and not scl and _has_uniform_parent_scale(target):
+        # Keep the scale and shear of the target, openMaya is used to rebuild the matrix
+        source_transform = OpenMaya.MTransformationMatrix(OpenMaya.MMatrix(get_matrix(node=source,
+                                                                                     skip_check=True)))
+        target_transform = OpenMaya.MTransformationMatrix(OpenMaya.MMatrix(get_matrix(node=target,
+                                                                                     skip_check=True)))
+        source_transform.setScale(target_transform.scale(OpenMaya.MSpace.kWorld), OpenMaya.MSpace.kWorld)
+        source_transform.setShear(target_transform.shear(OpenMaya.MSpace.kWorld), OpenMaya.MSpace.kWorld)
+
+        set_matrix(node=target, matrix=list(source_transform.asMatrix()), skip_check=True)
+        return
+
     if pos:
-        target_pos = get_position(node=source)
-        set_position(node=target, position=target_pos)
+        target_pos = get_position(node=source, skip_check=True)
+        set_position(node=target, position=target_pos, skip_check=True)
 
     if rot:
-        target_rot = get_rotation(node=source)
-        set_rotation(node=target, rotation=target_rot)
+        target_rot = get_rotation(node=source, skip_check=True)
+        set_rotation(node=target, rotation=target_rot, skip_check=True)
 
     if scl:
-        target_scl = get_scale(node=source)
-        set_scale(node=target, scale=target_scl)
+        target_scl = get_scale(node=source, skip_check=True)
+        set_scale(node=target, scale=target_scl, skip_check=True)
+
+
+def _get_numpy():
+    """
+    Import numpy the first time it is needed
+
+    Notes:
+        numpy is not shipped with every mayapy and its import is slow, the module does not import it at load
+
+    Returns:
+        numpy module or False when it is not available
+    """
+
+    global _NUMPY
+
+    if _NUMPY is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = False
+        _NUMPY = numpy
+
+    return _NUMPY
+
+
+def _multiply_matrices(left_matrices, right_matrices):
+    """
+    Multiply each left matrix by the right matrix at the same index
+
+    Notes:
+        numpy multiplies many matrices in one call when it is available, otherwise openMaya is used
+
+    Args:
+        left_matrices (list): Matrices represented by 16 double arguments
+        right_matrices (list): Matrices represented by 16 double arguments
+
+    Returns:
+        (list): Matrices represented by 16 double arguments
+    """
+
+    numpy = _get_numpy() if len(left_matrices) > 1 else False
+    if numpy:
+        left = numpy.array(left_matrices, dtype=float).reshape(-1, 4, 4)
+        right = numpy.array(right_matrices, dtype=float).reshape(-1, 4, 4)
+        return numpy.einsum('nij,njk->nik', left, right).reshape(-1, 16).tolist()
+
+    return [list(OpenMaya.MMatrix(left) * OpenMaya.MMatrix(right))
+            for left, right in zip(left_matrices, right_matrices)]
 
 
 def bake_transform_to_offset_parent_matrix(node):
@@ -230,21 +464,48 @@ def bake_transform_to_offset_parent_matrix(node):
 
     """
 
-    # Checks maya version
-    if not int(cmds.about(version=True).split('.')[0]) >= 2020:
-        raise Exception('You need a version of maya 2020 or higher')
+    bake_transforms_to_offset_parent_matrix([node])
 
-    # Checks
-    node_exists(node)
 
-    # openMAya is used because matrix multiplication is easier and faster
-    local_matrix = OpenMaya.MMatrix(cmds.xform(node, query=True, matrix=True, worldSpace=False))
-    offset_parent_matrix = OpenMaya.MMatrix(cmds.getAttr('{}.offsetParentMatrix'.format(node)))
+def bake_transforms_to_offset_parent_matrix(nodes):
+    """
+        Bake values from main matrix to the offset parent Matrix of many nodes
 
-    baked_matrix = local_matrix * offset_parent_matrix
+    Notes:
+        The matrices of all the nodes are multiplied together before any node is modified
 
-    # Reset main matrix
-    cmds.xform(node, matrix=IDENTITY_MATRIX, worldSpace=False, absolute=True)
+    Args:
+        nodes (list): Names of the nodes to bake the matrix
 
-    # Bake matrix values
-    cmds.setAttr('{}.offsetParentMatrix'.format(node), baked_matrix, type="matrix")
+    """
+
+    # Checks maya version
+    if not _get_maya_version() >= 2020:
+        raise Exception('You need a version of maya 2020 or higher')
+
+    # Checks
+    nodes = list(nodes)
+    if not nodes:
+        return
+    for node in nodes:
+        node_exists(node)
+
+    # openMaya reads the local and offset parent matrices without a Maya command per node
+    local_matrices = []
+    offset_parent_matrices = []
+    for node in nodes:
+        dag_path = _get_dag_path(node)
+        offset_parent_plug = OpenMaya.MFnDependencyNode(dag_path.node()).findPlug('offsetParentMatrix', False)
+        local_matrices.append(list(OpenMaya.MFnTransform(dag_path).transformationMatrix()))
+        offset_parent_matrices.append(list(OpenMaya.MFnMatrixData(offset_parent_plug.asMObject()).matrix()))
+
+    baked_matrices = _multiply_matrices(local_matrices, offset_parent_matrices)
+
+    # All the nodes are baked in a single undo step
+    with undo_chunk(), suspend_refresh():
+        # Reset main matrix of all the nodes in one call
+        cmds.xform(nodes, matrix=IDENTITY_MATRIX, worldSpace=False, absolute=True)
+
+        # Bake matrix values
+        for node, baked_matrix in zip(nodes, baked_matrices):
+            cmds.setAttr(node + '.offsetParentMatrix', baked_matrix, type="matrix")
@@ -0,0 +1,131 @@
+from contextlib import contextmanager
+
+from maya import cmds
+from maya.api import OpenMaya
+
+
+# Handles of the nodes resolved by name, validated every time they are used
+_NODE_HANDLES = {}
+
+
+def clear_node_cache():
+    """
+    Clear the cached node handles
+
+    Notes:
+        Cached nodes are validated when they are used, this only releases them
+    """
+
+    _NODE_HANDLES.clear()
+
+
+def has_name(node, node_object):
+    """
+    Check if a cached node still has the name it was cached with
+
+    Args:
+        node (str): Name or dag path of the node when it was cached
+        node_object (OpenMaya.MObject): Cached node
+
+    Returns:
+        bool
+    """
+
+    # Dag paths also change when a parent is renamed or the node is reparented
+    if '|' in node:
+        full_path = OpenMaya.MDagPath.getAPathTo(node_object).fullPathName()
+        return full_path.endswith('|' + node.lstrip('|'))
+
+    return OpenMaya.MFnDependencyNode(node_object).name() == node
+
+
+def get_node_object(node):
+    """
+    Get the openMaya object of a node by name
+
+    Notes:
+        Objects are cached while they are alive and keep their name, deleted and renamed nodes are resolved again
+
+    Args:
+        node (str): Name of the node
+
+    Returns:
+        OpenMaya.MObject or None when no node, or more than one node, has the name
+    """
+
+    node_handle = _NODE_HANDLES.get(node)
+    if node_handle is not None and node_handle.isValid() and has_name(node, node_handle.object()):
+        return node_handle.object()
+
+    selection = OpenMaya.MSelectionList()
+    try:
+        selection.add(node)
+    except RuntimeError:
+        _NODE_HANDLES.pop(node, None)
+        return None
+
+    node_object = selection.getDependNode(0)
+    _NODE_HANDLES[node] = OpenMaya.MObjectHandle(node_object)
+
+    return node_object
+
+
+@contextmanager
+def undo_chunk():
+    """
+    Group all the Maya commands executed inside the context in a single undo chunk
+
+    Notes:
+        Nested contexts are grouped in the outer undo chunk
+    """
+
+    cmds.undoInfo(openChunk=True)
+    try:
+        yield
+    finally:
+        cmds.undoInfo(closeChunk=True)
+
+
+@contextmanager
+def suspend_refresh():
+    """
+    Suspend the viewport refresh while the context is open
+
+    Notes:
+        The refresh is only restored by the context that suspended it, nested contexts and refresh
+        suspended by the caller are kept
+    """
+
+    suspended = cmds.refresh(query=True, suspend=True)
+    if not suspended:
+        cmds.refresh(suspend=True)
+    try:
+        yield
+    finally:
+        if not suspended:
+            cmds.refresh(suspend=False)
+
+
+@contextmanager
+def bulk_edit():
+    """
+    Suspend viewport refresh and switch to DG evaluation while editing many attributes
+
+    Notes:
+        All the Maya commands executed inside the context are grouped in a single undo chunk.
+        The evaluation mode is only changed and restored when it is not already DG, changing it
+        rebuilds the evaluation graph
+    """
+
+    evaluation_mode = cmds.evaluationManager(query=True, mode=True)[0]
+    switch_mode = evaluation_mode != 'off'
+
+    with suspend_refresh():
+        if switch_mode:
+            cmds.evaluationManager(mode='off')
+        try:
+            with undo_chunk():
+                yield
+        finally:
+            if switch_mode:
+                cmds.evaluationManager(mode=evaluation_mode)